@@ -0,0 +1,98 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+
+
+class TokenBucket:
+    def __init__(self, rate, burst, now):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def take(self, now):
+        """Take one token; return 0 on success or seconds until one is available."""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class RouteClass:
+    """Per-user token buckets plus a global in-flight limit for a group of routes."""
+
+    def __init__(self, name, rate, burst, concurrency, max_users=10000):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.concurrency = concurrency
+        self.max_users = max_users
+        self.buckets = OrderedDict()
+        self.in_flight = 0
+        self.counters = {'admitted': 0, 'rate_limited': 0, 'shed': 0}
+
+    def stats(self):
+        return {
+            'rate': self.rate,
+            'burst': self.burst,
+            'concurrency': self.concurrency,
+            'in_flight': self.in_flight,
+            'tracked_users': len(self.buckets),
+            **self.counters,
+        }
+
+
+class AdmissionController:
+    """In-process admission control.
+
+    ``admit`` never blocks: a request either gets a slot immediately or is
+    rejected with the status code and Retry-After value to send back, so
+    overload turns into fast failures instead of a growing queue.
+    """
+
+    def __init__(self, limits):
+        self._lock = threading.Lock()
+        self.route_classes = {
+            name: RouteClass(name, **limit) for name, limit in limits.items()
+        }
+
+    def admit(self, route_class, user_id):
+        """Return (None, 0) when admitted, otherwise (status_code, retry_after)."""
+        rc = self.route_classes[route_class]
+        now = time.monotonic()
+        with self._lock:
+            bucket = rc.buckets.get(user_id)
+            if bucket is None:
+                bucket = TokenBucket(rc.rate, rc.burst, now)
+                rc.buckets[user_id] = bucket
+                # Forget the least recently seen user so memory stays bounded
+                if len(rc.buckets) > rc.max_users:
+                    rc.buckets.popitem(last=False)
+            else:
+                rc.buckets.move_to_end(user_id)
+
+            wait = bucket.take(now)
+            if wait > 0:
+                rc.counters['rate_limited'] += 1
+                return 429, max(1, math.ceil(wait))
+
+            if rc.in_flight >= rc.concurrency:
+                # Give the token back; the user was within their rate
+                bucket.tokens += 1
+                rc.counters['shed'] += 1
+                return 503, 1
+
+            rc.in_flight += 1
+            rc.counters['admitted'] += 1
+            return None, 0
+
+    def release(self, route_class):
+        with self._lock:
+            self.route_classes[route_class].in_flight -= 1
+
+    def stats(self):
+        with self._lock:
+            return {name: rc.stats() for name, rc in self.route_classes.items()}
@@ -1,4 +1,4 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, make_response
 from flask_cors import CORS
 import joblib
 import numpy as np
@@ -7,7 +7,7 @@ from sklearn.preprocessing import StandardScaler
 from sklearn.ensemble import RandomForestClassifier
 import logging
 import os
-from pymongo import MongoClient
+from pymongo import MongoClient, ReturnDocument
 from datetime import datetime
 from bson import ObjectId
 from werkzeug.security import generate_password_hash, check_password_hash
@@ -15,17 +15,28 @@ import jwt
 import datetime
 from functools import wraps
 import certifi
+import hashlib
+import time
+from explain import ForestExplainer, FEATURE_NAMES
+from drift import DriftMonitor, build_training_profile
+from admission import AdmissionController
+from profiling import ProfilingMiddleware
+import secrets
 
 app = Flask(__name__)
 
+# On-demand request profiling, off until enabled through /admin/profiling
+profiler = ProfilingMiddleware(app.wsgi_app, output_dir='profiles')
+app.wsgi_app = profiler
+
 # Configure CORS
 CORS(app, resources={
     r"/*": {
         "origins": ["http://localhost:5173"],  # Your frontend origin
         "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-        "allow_headers": ["Content-Type", "Authorization", "Accept"],
+        "allow_headers": ["Content-Type", "Authorization", "Accept", "If-None-Match"],
         "supports_credentials": True,
-        "expose_headers": ["Content-Type", "Authorization"],
+        "expose_headers": ["Content-Type", "Authorization", "Retry-After", "ETag"],
         "max_age": 3600
     }
 })
@@ -47,6 +58,24 @@ logger = logging.getLogger(__name__)
 # JWT Configuration
 app.config['SECRET_KEY'] = 'your-secret-key'  # Change this to a secure secret key
 
+# Store feature contributions with the prediction record when /predict?explain=1
+app.config['STORE_EXPLANATIONS'] = True
+
+# Input drift monitoring: seconds between divergence recomputations
+app.config['DRIFT_REPORT_INTERVAL'] = 60
+
+# Seconds between checks for a model republished by retrain.py
+app.config['MODEL_RELOAD_INTERVAL'] = 30
+
+# Admission control: per-user token buckets (requests/second, burst) and a
+# global in-flight limit for each class of routes
+app.config['ADMISSION_LIMITS'] = {
+    'predict': {'rate': 1.0, 'burst': 10, 'concurrency': 4},
+    'read': {'rate': 5.0, 'burst': 20, 'concurrency': 16},
+    'write': {'rate': 1.0, 'burst': 5, 'concurrency': 4},
+}
+admission_controller = AdmissionController(app.config['ADMISSION_LIMITS'])
+
 # MongoDB Configuration
 try:
     # MongoDB Atlas connection string with URL-encoded credentials and auth source
@@ -90,9 +119,14 @@ except Exception as e:
 # Initialize global variables for model and scaler
 model = None
 scaler = None
+explainer = None
+drift_monitor = None
+model_version = None
+model_mtime = None
+model_checked_at = 0.0
 
 def load_model():
-    global model, scaler
+    global model, scaler, explainer, drift_monitor, model_mtime, model_version
     try:
         # Check if model exists, if not, train it
         if not os.path.exists('model/heart_model.pkl'):
@@ -100,13 +134,47 @@ def load_model():
             train_model()
         
         logger.info("Loading model and scaler...")
+        model_mtime = os.path.getmtime('model/heart_model.pkl')
+        with open('model/heart_model.pkl', 'rb') as f:
+            model_version = hashlib.sha1(f.read()).hexdigest()[:12]
         model = joblib.load('model/heart_model.pkl')
         scaler = joblib.load('model/scaler.pkl')
+        # Compact models from compact_model.py have no sklearn trees to explain
+        explainer = ForestExplainer(model) if hasattr(model, 'estimators_') else None
+        
+        # Training distribution for drift monitoring (older models were saved without it)
+        if not os.path.exists('model/training_profile.pkl'):
+            logger.info("Building training profile...")
+            data = pd.read_csv('data/heart.csv')
+            joblib.dump(build_training_profile(data.drop('target', axis=1).values),
+                        'model/training_profile.pkl')
+        # Rebuilt on every (re)load so drift is measured against the profile
+        # published with the current model
+        drift_monitor = DriftMonitor(joblib.load('model/training_profile.pkl'),
+                                     report_interval=app.config['DRIFT_REPORT_INTERVAL'])
         logger.info("Model and scaler loaded successfully")
     except Exception as e:
         logger.error(f"Error loading model: {str(e)}")
         raise
 
+# Pick up a model published by the background retraining job
+def reload_model_if_changed():
+    global model_checked_at
+    if scaler is None:
+        load_model()
+        return
+
+    now = time.monotonic()
+    if now - model_checked_at < app.config['MODEL_RELOAD_INTERVAL']:
+        return
+    model_checked_at = now
+    try:
+        if os.path.getmtime('model/heart_model.pkl') != model_mtime:
+            logger.info("Model file changed, reloading")
+            load_model()
+    except Exception as e:
+        logger.error(f"Error reloading model: {str(e)}")
+
 def train_model():
     try:
         logger.info("Loading training data...")
@@ -131,6 +199,7 @@ def train_model():
         # Save the model and scaler
         joblib.dump(model, 'model/heart_model.pkl')
         joblib.dump(scaler, 'model/scaler.pkl')
+        joblib.dump(build_training_profile(X.values), 'model/training_profile.pkl')
         logger.info("Model trained and saved successfully")
     except Exception as e:
         logger.error(f"Error training model: {str(e)}")
@@ -171,7 +240,8 @@ def signup():
             'password': generate_password_hash(data['password']),
             'name': data['name'],
             'created_at': datetime.datetime.utcnow(),
-            'predictions': []
+            'predictions': [],
+            'history_version': 0
         }
         
         # Insert user into database
@@ -273,17 +343,35 @@ def token_required(f):
             data = jwt.decode(token, app.config['SECRET_KEY'], algorithms=["HS256"])
             logger.debug(f"Token decoded successfully: {data}")
             
-            # Verify user exists in database
-            current_user = users_collection.find_one({'_id': ObjectId(data['user_id'])})
-            if not current_user:
-                logger.error(f"No user found for ID: {data['user_id']}")
-                return jsonify({
-                    'error': 'User not found',
-                    'success': False
-                }), 401
-                
-            logger.info(f"User authenticated successfully: {current_user['email']}")
-            return f(current_user, *args, **kwargs)
+            # Admission control runs on the token's user_id, before the user
+            # lookup, so rejected requests never reach the database
+            route_class = getattr(f, 'admission_class', None)
+            if route_class is not None:
+                status, retry_after = admission_controller.admit(route_class, data['user_id'])
+                if status is not None:
+                    logger.warning(f"Rejected {route_class} request from user {data['user_id']} with {status}")
+                    response = jsonify({
+                        'error': 'Too many requests' if status == 429 else 'Server is busy, please retry',
+                        'success': False
+                    })
+                    response.headers['Retry-After'] = str(retry_after)
+                    return response, status
+            
+            try:
+                # Verify user exists in database
+                current_user = users_collection.find_one({'_id': ObjectId(data['user_id'])})
+                if not current_user:
+                    logger.error(f"No user found for ID: {data['user_id']}")
+                    return jsonify({
+                        'error': 'User not found',
+                        'success': False
+                    }), 401
+                    
+                logger.info(f"User authenticated successfully: {current_user['email']}")
+                return f(current_user, *args, **kwargs)
+            finally:
+                if route_class is not None:
+                    admission_controller.release(route_class)
             
         except jwt.ExpiredSignatureError:
             logger.error("Token has expired")
@@ -307,9 +395,39 @@ def token_required(f):
     
     return decorated
 
+# Put a route under admission control for the given route class. The check
+# itself runs in token_required, right after the JWT is decoded, so this must
+# be applied directly below @token_required.
+def admission_controlled(route_class):
+    def decorator(f):
+        f.admission_class = route_class
+        return f
+    return decorator
+
+# Answer If-None-Match from the user's history_version, which every insert,
+# update and delete of their predictions bumps after writing. The user document
+# is already loaded by token_required, so a 304 never touches predictions_collection.
+def history_cached(f):
+    @wraps(f)
+    def decorated(current_user, *args, **kwargs):
+        version = f"{current_user['_id']}:{current_user.get('history_version', 0)}:{request.full_path}"
+        etag = hashlib.sha1(version.encode()).hexdigest()
+        if request.if_none_match.contains_weak(etag):
+            response = make_response('', 304)
+            response.set_etag(etag, weak=True)
+            return response
+
+        response = make_response(f(current_user, *args, **kwargs))
+        if response.status_code == 200:
+            response.set_etag(etag, weak=True)
+            response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+    return decorated
+
 # Update the predict endpoint to save predictions to user history
 @app.route('/predict', methods=['POST'])
 @token_required
+@admission_controlled('predict')
 def predict(current_user):
     try:
         logger.info("Received prediction request")
@@ -325,8 +443,7 @@ def predict(current_user):
         logger.debug(f"Received data: {data}")
         
         # Extract features from the request
-        required_fields = ['age', 'gender', 'chestPain', 'restingBP', 'cholesterol', 
-                         'fastingBS', 'restingECG', 'maxHR', 'smoking', 'obesity']
+        required_fields = FEATURE_NAMES
         
         # Check if all required fields are present
         for field in required_fields:
@@ -338,24 +455,14 @@ def predict(current_user):
                 }), 400
         
         # Extract and preprocess features
-        features = np.array([
-            data['age'],
-            data['gender'],
-            encode_chest_pain(data['chestPain']),
-            data['restingBP'],
-            data['cholesterol'],
-            data['fastingBS'],
-            encode_resting_ecg(data['restingECG']),
-            data['maxHR'],
-            data['smoking'],
-            data['obesity']
-        ]).reshape(1, -1)
+        features = np.array(build_features(data)).reshape(1, -1)
         
         logger.debug(f"Processed features: {features}")
         
         # Scale the features
-        if scaler is None:
-            load_model()
+        reload_model_if_changed()
+        
+        drift_monitor.update(features)
         
         features_scaled = scaler.transform(features)
         
@@ -365,29 +472,27 @@ def predict(current_user):
         
         logger.info(f"Prediction result: {prediction}")
         logger.debug(f"Prediction probabilities: {prediction_proba}")
+
+        # Optional per-feature contributions (?explain=1)
+        explanation = None
+        if request.args.get('explain', '').lower() in ('1', 'true', 'yes') and explainer is not None:
+            explanation = explainer.explain_row(features_scaled)
+            logger.debug(f"Prediction explanation: {explanation}")
         
         # Create prediction record with detailed information
         prediction_record = {
             'user_id': current_user['_id'],
             'user_name': current_user['name'],
             'user_email': current_user['email'],
-            'input_data': {
-                'age': data['age'],
-                'gender': 'male' if data['gender'] == 1 else 'female',
-                'chestPain': data['chestPain'],
-                'restingBP': data['restingBP'],
-                'cholesterol': data['cholesterol'],
-                'fastingBS': 'yes' if data['fastingBS'] == 1 else 'no',
-                'restingECG': data['restingECG'],
-                'maxHR': data['maxHR'],
-                'smoking': 'yes' if data['smoking'] == 1 else 'no',
-                'obesity': 'yes' if data['obesity'] == 1 else 'no'
-            },
+            'input_data': format_input_data(data),
             'prediction': int(prediction),
             'probability': float(prediction_proba[1]),
             'timestamp': datetime.datetime.utcnow(),
-            'risk_level': 'High' if prediction == 1 else 'Low'
+            'risk_level': 'High' if prediction == 1 else 'Low',
+            'model_version': model_version
         }
+        if explanation is not None and app.config['STORE_EXPLANATIONS']:
+            prediction_record['explanation'] = explanation
         
         # Insert prediction into database
         result = predictions_collection.insert_one(prediction_record)
@@ -395,17 +500,21 @@ def predict(current_user):
         # Update user's predictions array with the new prediction ID
         users_collection.update_one(
             {'_id': current_user['_id']},
-            {'$push': {'predictions': result.inserted_id}}
+            {'$push': {'predictions': result.inserted_id}, '$inc': {'history_version': 1}}
         )
         
-        return jsonify({
+        response_data = {
             'prediction': int(prediction),
             'probability': float(prediction_proba[1]),
             'user_name': current_user['name'],
             'user_email': current_user['email'],
             'risk_level': 'High' if prediction == 1 else 'Low',
             'success': True
-        })
+        }
+        if explanation is not None:
+            response_data['explanation'] = explanation
+        
+        return jsonify(response_data)
         
     except Exception as e:
         logger.error(f"Error during prediction: {str(e)}")
@@ -416,6 +525,8 @@ def predict(current_user):
 
 @app.route('/user/predictions', methods=['GET'])
 @token_required
+@admission_controlled('read')
+@history_cached
 def get_user_predictions(current_user):
     try:
         logger.info(f"Fetching predictions for user: {current_user['email']}")
@@ -486,6 +597,7 @@ def get_user_predictions(current_user):
 
 @app.route('/user/predictions/<prediction_id>', methods=['DELETE', 'OPTIONS'])
 @token_required
+@admission_controlled('write')
 def delete_prediction(current_user, prediction_id):
     # Handle preflight OPTIONS request
     if request.method == 'OPTIONS':
@@ -508,11 +620,14 @@ def delete_prediction(current_user, prediction_id):
                 'success': False
             }), 400
 
-        # Find the prediction
-        prediction = predictions_collection.find_one({
-            '_id': prediction_obj_id,
-            'user_id': current_user['_id']
-        })
+        # Find and delete the prediction in a single round trip
+        prediction = predictions_collection.find_one_and_delete(
+            {
+                '_id': prediction_obj_id,
+                'user_id': current_user['_id']
+            },
+            projection={'_id': 1}
+        )
         
         if not prediction:
             logger.error(f"Prediction {prediction_id} not found or does not belong to user")
@@ -521,23 +636,10 @@ def delete_prediction(current_user, prediction_id):
                 'success': False
             }), 404
         
-        # Delete the prediction
-        result = predictions_collection.delete_one({
-            '_id': prediction_obj_id,
-            'user_id': current_user['_id']
-        })
-        
-        if result.deleted_count == 0:
-            logger.error("Failed to delete prediction")
-            return jsonify({
-                'error': 'Failed to delete prediction',
-                'success': False
-            }), 400
-        
         # Remove prediction ID from user's predictions array
         users_collection.update_one(
             {'_id': current_user['_id']},
-            {'$pull': {'predictions': prediction_obj_id}}
+            {'$pull': {'predictions': prediction_obj_id}, '$inc': {'history_version': 1}}
         )
         
         logger.info(f"Successfully deleted prediction {prediction_id}")
@@ -578,6 +680,64 @@ def encode_resting_ecg(resting_ecg):
     }
     return mapping.get(resting_ecg, 0)
 
+# Model feature row (FEATURE_NAMES order) from a /predict payload
+def build_features(data):
+    return [
+        data['age'],
+        data['gender'],
+        encode_chest_pain(data['chestPain']),
+        data['restingBP'],
+        data['cholesterol'],
+        data['fastingBS'],
+        encode_resting_ecg(data['restingECG']),
+        data['maxHR'],
+        data['smoking'],
+        data['obesity']
+    ]
+
+# Validate an edited input_data and convert it back to a /predict payload.
+# Accepts both the stored form ('male', 'yes') and the payload form (1/0).
+def parse_input_data(input_data):
+    if not isinstance(input_data, dict):
+        return None, 'input_data must be an object'
+
+    flags = {'gender': ('male', 'female'), 'fastingBS': ('yes', 'no'),
+             'smoking': ('yes', 'no'), 'obesity': ('yes', 'no')}
+    categories = {'chestPain': ('typical', 'atypical', 'nonanginal', 'asymptomatic'),
+                  'restingECG': ('normal', 'st-t', 'lv')}
+    data = {}
+    for field in FEATURE_NAMES:
+        if field not in input_data:
+            return None, f'Missing required field: {field}'
+        value = input_data[field]
+        if field in flags:
+            if value in flags[field]:
+                value = 1 if value == flags[field][0] else 0
+            elif value not in (0, 1) or isinstance(value, bool):
+                return None, f'Invalid value for {field}: {value}'
+        elif field in categories:
+            if value not in categories[field]:
+                return None, f'Invalid value for {field}: {value}'
+        elif not isinstance(value, (int, float)) or isinstance(value, bool):
+            return None, f'Invalid value for {field}: {value}'
+        data[field] = value
+    return data, None
+
+# Human-readable copy of a /predict payload as stored in prediction records
+def format_input_data(data):
+    return {
+        'age': data['age'],
+        'gender': 'male' if data['gender'] == 1 else 'female',
+        'chestPain': data['chestPain'],
+        'restingBP': data['restingBP'],
+        'cholesterol': data['cholesterol'],
+        'fastingBS': 'yes' if data['fastingBS'] == 1 else 'no',
+        'restingECG': data['restingECG'],
+        'maxHR': data['maxHR'],
+        'smoking': 'yes' if data['smoking'] == 1 else 'no',
+        'obesity': 'yes' if data['obesity'] == 1 else 'no'
+    }
+
 # Load the model when the server starts
 try:
     load_model()
@@ -617,9 +777,93 @@ def get_all_predictions(current_user):
             'success': False
         }), 400
 
+# Input drift against the training distribution (admin only)
+@app.route('/admin/drift', methods=['GET'])
+@token_required
+def get_drift_report(current_user):
+    try:
+        if not current_user.get('is_admin', False):
+            return jsonify({
+                'error': 'Unauthorized access',
+                'success': False
+            }), 403
+
+        refresh = request.args.get('refresh', '').lower() in ('1', 'true', 'yes')
+        return jsonify({
+            'success': True,
+            'drift': drift_monitor.report(refresh=refresh)
+        })
+
+    except Exception as e:
+        logger.error(f"Error computing drift report: {str(e)}")
+        return jsonify({
+            'error': str(e),
+            'success': False
+        }), 400
+
+# Admission control counters (admin only)
+@app.route('/admin/admission', methods=['GET'])
+@token_required
+def get_admission_stats(current_user):
+    if not current_user.get('is_admin', False):
+        return jsonify({
+            'error': 'Unauthorized access',
+            'success': False
+        }), 403
+
+    return jsonify({
+        'success': True,
+        'admission': admission_controller.stats()
+    })
+
+# Request profiling settings (admin only)
+@app.route('/admin/profiling', methods=['GET', 'POST'])
+@token_required
+def configure_profiling(current_user):
+    try:
+        if not current_user.get('is_admin', False):
+            return jsonify({
+                'error': 'Unauthorized access',
+                'success': False
+            }), 403
+
+        if request.method == 'POST':
+            data = request.get_json() or {}
+            sample_rate = float(data.get('sample_rate', profiler.sample_rate))
+            if not 0 <= sample_rate <= 1:
+                return jsonify({
+                    'error': 'sample_rate must be between 0 and 1',
+                    'success': False
+                }), 400
+            profiler.sample_rate = sample_rate
+
+            # A token lets a single request opt in with an X-Profile header
+            if 'header_token' in data:
+                profiler.token = secrets.token_urlsafe(16) if data['header_token'] else None
+            logger.info(f"Profiling updated by {current_user['email']}: sample_rate={sample_rate}")
+
+        return jsonify({
+            'success': True,
+            'profiling': {
+                'sample_rate': profiler.sample_rate,
+                'header_token': profiler.token,
+                'output_dir': os.path.abspath(profiler.output_dir),
+                'recent_files': profiler.recent_files()
+            }
+        })
+
+    except Exception as e:
+        logger.error(f"Error configuring profiling: {str(e)}")
+        return jsonify({
+            'error': str(e),
+            'success': False
+        }), 400
+
 # Get a single prediction by ID
 @app.route('/predictions/<prediction_id>', methods=['GET'])
 @token_required
+@admission_controlled('read')
+@history_cached
 def get_prediction(current_user, prediction_id):
     try:
         # Validate prediction ID format
@@ -662,8 +906,11 @@ def get_prediction(current_user, prediction_id):
         }), 400
 
 # Update a prediction
+EDITABLE_PREDICTION_FIELDS = ('input_data', 'notes')
+
 @app.route('/predictions/<prediction_id>', methods=['PUT'])
 @token_required
+@admission_controlled('write')
 def update_prediction(current_user, prediction_id):
     try:
         # Validate prediction ID format
@@ -675,46 +922,80 @@ def update_prediction(current_user, prediction_id):
                 'success': False
             }), 400
 
-        # Find the prediction
-        prediction = predictions_collection.find_one({
-            '_id': prediction_obj_id,
-            'user_id': current_user['_id']
-        })
+        # Get update data from request
+        body = request.get_json(silent=True)
+        if not isinstance(body, dict):
+            return jsonify({
+                'error': 'Request body must be a JSON object',
+                'success': False
+            }), 400
 
-        if not prediction:
+        # Only these fields can be edited; model outputs are only ever
+        # written by re-scoring input_data below
+        unknown_fields = sorted(set(body) - set(EDITABLE_PREDICTION_FIELDS))
+        if unknown_fields:
             return jsonify({
-                'error': 'Prediction not found',
+                'error': f'Fields cannot be updated: {", ".join(unknown_fields)}',
                 'success': False
-            }), 404
+            }), 400
 
-        # Get update data from request
-        update_data = request.get_json()
-        
-        # Remove fields that shouldn't be updated
-        update_data.pop('_id', None)
-        update_data.pop('user_id', None)
-        update_data.pop('timestamp', None)
+        update_data = dict(body)
+        if 'notes' in update_data and not isinstance(update_data['notes'], str):
+            return jsonify({
+                'error': 'notes must be a string',
+                'success': False
+            }), 400
 
-        # Update the prediction
-        result = predictions_collection.update_one(
+        if not update_data:
+            return jsonify({
+                'error': 'No changes made to prediction',
+                'success': False
+            }), 400
+
+        update = {'$set': update_data}
+        if 'input_data' in update_data:
+            data, error = parse_input_data(update_data['input_data'])
+            if error:
+                return jsonify({
+                    'error': error,
+                    'success': False
+                }), 400
+
+            # Re-score the edited inputs so the stored result never goes stale
+            reload_model_if_changed()
+            features_scaled = scaler.transform(np.array(build_features(data)).reshape(1, -1))
+            prediction = model.predict(features_scaled)[0]
+            prediction_proba = model.predict_proba(features_scaled)[0]
+            update_data.update({
+                'input_data': format_input_data(data),
+                'prediction': int(prediction),
+                'probability': float(prediction_proba[1]),
+                'risk_level': 'High' if prediction == 1 else 'Low',
+                'model_version': model_version
+            })
+            update['$unset'] = {'explanation': ''}
+
+        # Update and fetch the prediction in a single round trip
+        updated_prediction = predictions_collection.find_one_and_update(
             {
                 '_id': prediction_obj_id,
                 'user_id': current_user['_id']
             },
-            {'$set': update_data}
+            update,
+            return_document=ReturnDocument.AFTER
         )
 
-        if result.modified_count == 0:
+        if not updated_prediction:
             return jsonify({
-                'error': 'No changes made to prediction',
+                'error': 'Prediction not found',
                 'success': False
-            }), 400
+            }), 404
 
-        # Get updated prediction
-        updated_prediction = predictions_collection.find_one({
-            '_id': prediction_obj_id,
-            'user_id': current_user['_id']
-        })
+        # Invalidate cached history for this user
+        users_collection.update_one(
+            {'_id': current_user['_id']},
+            {'$inc': {'history_version': 1}}
+        )
 
         # Convert ObjectId to string for JSON serialization
         updated_prediction['_id'] = str(updated_prediction['_id'])
@@ -738,6 +1019,7 @@ def update_prediction(current_user, prediction_id):
 # Delete a prediction (already exists, but adding a bulk delete endpoint)
 @app.route('/predictions/bulk-delete', methods=['POST'])
 @token_required
+@admission_controlled('write')
 def bulk_delete_predictions(current_user):
     try:
         data = request.get_json()
@@ -767,7 +1049,8 @@ def bulk_delete_predictions(current_user):
         # Remove prediction IDs from user's predictions array
         users_collection.update_one(
             {'_id': current_user['_id']},
-            {'$pull': {'predictions': {'$in': prediction_obj_ids}}}
+            {'$pull': {'predictions': {'$in': prediction_obj_ids}},
+             '$inc': {'history_version': result.deleted_count}}
         )
 
         return jsonify({
@@ -785,6 +1068,8 @@ def bulk_delete_predictions(current_user):
 # Get predictions with pagination and filtering
 @app.route('/predictions', methods=['GET'])
 @token_required
+@admission_controlled('read')
+@history_cached
 def get_filtered_predictions(current_user):
     try:
         # Get query parameters
@@ -0,0 +1,70 @@
+"""Benchmark explanation latency against plain scoring.
+
+Run from the backend directory:
+
+    python bench_explain.py [--repeat 200] [--budget 3.0]
+
+Exits non-zero if explaining costs more than ``budget`` times plain
+``predict_proba`` for either a single row or a batch.
+"""
+import argparse
+import sys
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from explain import ForestExplainer
+
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--budget', type=float, default=3.0)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    model = joblib.load('model/heart_model.pkl')
+    scaler = joblib.load('model/scaler.pkl')
+    explainer = ForestExplainer(model)
+
+    data = pd.read_csv('data/heart.csv')
+    X = scaler.transform(data.drop('target', axis=1).values)
+    rng = np.random.default_rng(42)
+    batch = X[rng.integers(0, len(X), size=args.batch_size)]
+    single = X[:1]
+
+    # Sanity check: contributions must add back up to the model's probability
+    probabilities, _ = explainer.explain(batch)
+    expected = model.predict_proba(batch)[:, explainer.class_index]
+    if not np.allclose(probabilities, expected):
+        print("Explanation does not reconstruct predict_proba")
+        return 1
+
+    failed = False
+    for label, rows in (('single row', single), (f'batch of {len(batch)}', batch)):
+        score = best_of(lambda: model.predict_proba(rows), args.repeat)
+        explain = best_of(lambda: explainer.explain(rows), args.repeat)
+        ratio = explain / score
+        print(f"{label}: predict_proba {score * 1e3:.3f} ms, "
+              f"explain {explain * 1e3:.3f} ms, ratio {ratio:.2f}x")
+        failed = failed or ratio > args.budget
+
+    if failed:
+        print(f"Explanation exceeded the {args.budget:.1f}x latency budget")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,143 @@
+import numpy as np
+
+QUANT_LIMIT = np.iinfo(np.int16).max
+
+
+def _tree_arrays(tree, class_index, max_depth, merge_tolerance):
+    """Flatten one sklearn tree into (feature, threshold, left, right, value).
+
+    Nodes at ``max_depth`` become leaves, and an internal node whose children
+    are leaves with (near) equal values is collapsed into a single leaf.
+    Unreachable nodes are dropped and the rest renumbered from 0.
+    """
+    values = tree.value[:, 0, :]
+    probas = values[:, class_index] / values.sum(axis=1)
+    left = tree.children_left.copy()
+    right = tree.children_right.copy()
+
+    # Depth-limit pruning (parents always precede children in sklearn trees)
+    depth = np.zeros(tree.node_count, dtype=np.intp)
+    for node in range(tree.node_count):
+        if left[node] >= 0:
+            if max_depth is not None and depth[node] >= max_depth:
+                left[node] = right[node] = -1
+            else:
+                depth[left[node]] = depth[right[node]] = depth[node] + 1
+
+    # Merge equivalent sibling leaves bottom-up
+    leaf_value = probas.copy()
+    for node in range(tree.node_count - 1, -1, -1):
+        l, r = left[node], right[node]
+        if l >= 0 and left[l] < 0 and left[r] < 0 and abs(leaf_value[l] - leaf_value[r]) <= merge_tolerance:
+            weights = values[[l, r]].sum(axis=1)
+            leaf_value[node] = np.average(leaf_value[[l, r]], weights=weights)
+            left[node] = right[node] = -1
+
+    # Renumber reachable nodes in breadth-first order
+    order = [0]
+    for node in order:
+        if left[node] >= 0:
+            order.extend((left[node], right[node]))
+    order = np.array(order)
+    new_index = np.full(tree.node_count, -1, dtype=np.intp)
+    new_index[order] = np.arange(len(order))
+
+    is_leaf = left[order] < 0
+    own = np.arange(len(order))
+    return (
+        np.where(is_leaf, -1, tree.feature[order]),
+        np.where(is_leaf, 0.0, tree.threshold[order]),
+        # Leaves point at themselves so traversal can run a fixed number of steps
+        np.where(is_leaf, own, new_index[np.maximum(left[order], 0)]),
+        np.where(is_leaf, own, new_index[np.maximum(right[order], 0)]),
+        leaf_value[order],
+        int(depth[order].max()),
+    )
+
+
+class CompactForest:
+    """A pruned, optionally quantized copy of a RandomForestClassifier.
+
+    All trees are packed into flat arrays with the smallest dtypes that fit,
+    and prediction walks every tree for every row together in numpy.
+    With ``quantize=True`` thresholds are stored as int16 (per-feature scale)
+    and leaf probabilities as uint8.
+    """
+
+    def __init__(self, model, n_trees=None, max_depth=None, merge_tolerance=0.0,
+                 quantize=False, positive_class=1):
+        self.classes_ = model.classes_
+        self.n_features_in_ = model.n_features_in_
+        self.quantize = quantize
+        class_index = list(model.classes_).index(positive_class)
+
+        estimators = model.estimators_[:n_trees]
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        self.depth = 0
+        for estimator in estimators:
+            feature, threshold, left, right, value, depth = _tree_arrays(
+                estimator.tree_, class_index, max_depth, merge_tolerance)
+            features.append(feature)
+            thresholds.append(threshold)
+            lefts.append(left + offset)
+            rights.append(right + offset)
+            values.append(value)
+            roots.append(offset)
+            offset += len(feature)
+            self.depth = max(self.depth, depth)
+
+        index_dtype = np.int16 if offset <= np.iinfo(np.int16).max else np.int32
+        self.feature = np.concatenate(features).astype(np.int8)
+        self.left = np.concatenate(lefts).astype(index_dtype)
+        self.right = np.concatenate(rights).astype(index_dtype)
+        self.roots = np.array(roots, dtype=index_dtype)
+        threshold = np.concatenate(thresholds)
+        value = np.concatenate(values)
+
+        if quantize:
+            # The largest threshold maps to QUANT_LIMIT - 1, leaving the
+            # outermost codes for inputs beyond every threshold
+            self.scale = np.ones(self.n_features_in_, dtype=np.float32)
+            for f in range(self.n_features_in_):
+                used = np.abs(threshold[self.feature == f])
+                if used.size and used.max() > 0:
+                    self.scale[f] = used.max() / (QUANT_LIMIT - 1)
+            codes = self._quantize(threshold, np.maximum(self.feature, 0))
+            self.threshold = np.minimum(codes, QUANT_LIMIT - 1).astype(np.int16)
+            self.value = np.round(value * 255).astype(np.uint8)
+        else:
+            self.threshold = threshold.astype(np.float32)
+            self.value = value.astype(np.float32)
+
+    def _quantize(self, values, features):
+        # Floor on both sides keeps x <= t implying q(x) <= q(t)
+        codes = np.floor(np.asarray(values, dtype=np.float64) / self.scale[features].astype(np.float64))
+        return np.clip(codes, -QUANT_LIMIT, QUANT_LIMIT)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    def _leaves(self, X):
+        if self.quantize:
+            X = self._quantize(X, np.arange(self.n_features_in_)).astype(np.int16)
+        else:
+            X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(len(X))[:, None]
+        nodes = np.broadcast_to(self.roots, (len(X), len(self.roots))).astype(np.intp)
+        feature = np.maximum(self.feature, 0)
+        for _ in range(self.depth):
+            go_left = X[rows, feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return nodes
+
+    def predict_proba(self, X):
+        values = self.value[self._leaves(X)].astype(np.float32)
+        if self.quantize:
+            values /= 255
+        positive = values.mean(axis=1)
+        return np.column_stack((1 - positive, positive))
+
+    def predict(self, X):
+        return self.classes_[(self.predict_proba(X)[:, 1] > 0.5).astype(int)]
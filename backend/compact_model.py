@@ -0,0 +1,135 @@
+"""Build compact variants of the serving forest and report accuracy vs cost.
+
+Run from the backend directory:
+
+    python compact_model.py --data model/retrain_holdout.csv --accuracy-floor 0.85
+                            [--output model/heart_model_compact.pkl]
+
+Every variant is scored on the dataset and measured for artifact size, load
+time and single-row/batch latency, and its probabilities are compared with
+the full forest's. The smallest variant whose accuracy is at or above the
+floor is written to --output when given. Quantized variants whose output
+drifts from their float counterpart by more than --quant-tolerance are not
+eligible.
+
+--data should hold rows the forest was not fit on (for example the holdout
+kept by retrain.py). It must have the ten model feature columns in training
+order plus ``target`` (data/heart.csv layout). Scoring on data/heart.csv, the
+training set, only gives in-sample accuracy and the report says so.
+heart_cleveland.csv has no smoking/obesity columns and codes chest pain and
+ECG differently, so it cannot score this model directly.
+"""
+import argparse
+import io
+import itertools
+import os
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.metrics import accuracy_score
+
+from compact import CompactForest
+
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def measure(name, variant, X, y, repeat, batch, reference):
+    buffer = io.BytesIO()
+    joblib.dump(variant, buffer)
+    payload = buffer.getvalue()
+    return {
+        'variant': name,
+        'model': variant,
+        'accuracy': accuracy_score(y, variant.predict(X)),
+        'max_dp': float(np.abs(variant.predict_proba(batch)[:, 1] - reference).max()),
+        'size_kb': len(payload) / 1024,
+        'load_ms': best_of(lambda: joblib.load(io.BytesIO(payload)), max(1, repeat // 10)) * 1e3,
+        'single_us': best_of(lambda: variant.predict_proba(X[:1]), repeat) * 1e6,
+        'batch_ms': best_of(lambda: variant.predict_proba(batch), max(1, repeat // 10)) * 1e3,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--model', default='model/heart_model.pkl')
+    parser.add_argument('--scaler', default='model/scaler.pkl')
+    parser.add_argument('--data', required=True, help="labeled rows the forest was not fit on")
+    parser.add_argument('--training-data', default='data/heart.csv')
+    parser.add_argument('--accuracy-floor', type=float, required=True)
+    parser.add_argument('--quant-tolerance', type=float, default=0.02,
+                        help="max probability difference between a quantized variant and its float version")
+    parser.add_argument('--output', default=None)
+    parser.add_argument('--repeat', type=int, default=100)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--trees', default='100,50,25,10')
+    parser.add_argument('--depths', default='none,8,6,4')
+    args = parser.parse_args()
+
+    model = joblib.load(args.model)
+    scaler = joblib.load(args.scaler)
+    data = pd.read_csv(args.data)
+    X = scaler.transform(data.drop('target', axis=1).values)
+    y = data['target'].values
+    rng = np.random.default_rng(42)
+    batch = X[rng.integers(0, len(X), size=args.batch_size)]
+    reference = model.predict_proba(batch)[:, 1]
+    in_sample = (os.path.exists(args.training_data)
+                 and os.path.samefile(args.data, args.training_data))
+
+    results = [measure('full sklearn forest', model, X, y, args.repeat, batch, reference)]
+    float_output = {}
+    trees = [int(t) for t in args.trees.split(',')]
+    depths = [None if d == 'none' else int(d) for d in args.depths.split(',')]
+    for n_trees, max_depth, quantize in itertools.product(trees, depths, (False, True)):
+        variant = CompactForest(model, n_trees=n_trees, max_depth=max_depth,
+                                merge_tolerance=1 / 255 if quantize else 0.0,
+                                quantize=quantize)
+        name = (f"{min(n_trees, len(model.estimators_))} trees, depth {max_depth or 'full'}"
+                f"{', int16/uint8' if quantize else ''} ({variant.n_nodes} nodes)")
+        result = measure(name, variant, X, y, args.repeat, batch, reference)
+        output = variant.predict_proba(batch)[:, 1]
+        result['quant_ok'] = True
+        if quantize:
+            quant_error = float(np.abs(output - float_output[(n_trees, max_depth)]).max())
+            result['quant_ok'] = quant_error <= args.quant_tolerance
+            if not result['quant_ok']:
+                print(f"Warning: {name} differs from its float version by {quant_error:.3f}")
+        else:
+            float_output[(n_trees, max_depth)] = output
+        results.append(result)
+
+    floor = args.accuracy_floor
+    if in_sample:
+        print(f"Note: {args.data} is the training set; accuracy below is in-sample "
+              f"and overstates every variant\n")
+    print(f"Accuracy on {len(y)} rows of {args.data}; max dP is the largest probability "
+          f"difference from the full forest")
+    print(f"{'variant':<48} {'accuracy':>8} {'max dP':>7} {'size KB':>9} {'load ms':>8} "
+          f"{'1 row us':>9} {'batch ms':>9}")
+    for r in results:
+        print(f"{r['variant']:<48} {r['accuracy']:>8.4f} {r['max_dp']:>7.3f} {r['size_kb']:>9.1f} "
+              f"{r['load_ms']:>8.2f} {r['single_us']:>9.1f} {r['batch_ms']:>9.2f}")
+
+    eligible = [r for r in results if r['accuracy'] >= floor and r.get('quant_ok', True)]
+    if not eligible:
+        print(f"\nNo variant reaches accuracy {floor:.4f}")
+        return
+    chosen = min(eligible, key=lambda r: r['size_kb'])
+    print(f"\nSmallest variant with accuracy >= {floor:.4f}: {chosen['variant']}")
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+        joblib.dump(chosen['model'], args.output)
+        print(f"Written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
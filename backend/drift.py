@@ -0,0 +1,139 @@
+import threading
+import time
+
+import numpy as np
+
+from explain import FEATURE_NAMES
+
+NUMERIC_FEATURES = ['age', 'restingBP', 'cholesterol', 'maxHR']
+CATEGORICAL_FEATURES = {
+    'gender': [0, 1],
+    'chestPain': [0, 1, 2, 3],
+    'fastingBS': [0, 1],
+    'restingECG': [0, 1, 2],
+    'smoking': [0, 1],
+    'obesity': [0, 1],
+}
+
+# Small count added to every bin so empty bins don't blow up the divergence
+SMOOTHING = 0.5
+
+
+def build_training_profile(X, n_bins=10):
+    """Summarise the training matrix (columns in FEATURE_NAMES order).
+
+    Numeric features get quantile bin edges with open-ended outer bins, so any
+    production value lands in a bin. Categorical features get one count per
+    known category plus a trailing bucket for unseen values.
+    """
+    X = np.asarray(X, dtype=float)
+    profile = {'numeric': {}, 'categorical': {}, 'n_samples': len(X)}
+    for name in NUMERIC_FEATURES:
+        column = X[:, FEATURE_NAMES.index(name)]
+        inner = np.unique(np.quantile(column, np.linspace(0, 1, n_bins + 1)[1:-1]))
+        edges = np.concatenate(([-np.inf], inner, [np.inf]))
+        counts, _ = np.histogram(column, bins=edges)
+        profile['numeric'][name] = {'edges': edges, 'counts': counts}
+    for name, categories in CATEGORICAL_FEATURES.items():
+        column = X[:, FEATURE_NAMES.index(name)]
+        counts = np.array([np.sum(column == c) for c in categories]
+                          + [np.sum(~np.isin(column, categories))])
+        profile['categorical'][name] = {'categories': categories, 'counts': counts}
+    return profile
+
+
+def population_stability_index(expected, actual):
+    expected = (expected + SMOOTHING) / (expected.sum() + SMOOTHING * len(expected))
+    actual = (actual + SMOOTHING) / (actual.sum() + SMOOTHING * len(actual))
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def jensen_shannon(expected, actual):
+    expected = (expected + SMOOTHING) / (expected.sum() + SMOOTHING * len(expected))
+    actual = (actual + SMOOTHING) / (actual.sum() + SMOOTHING * len(actual))
+    mean = (expected + actual) / 2
+    return float(0.5 * np.sum(expected * np.log(expected / mean))
+                 + 0.5 * np.sum(actual * np.log(actual / mean)))
+
+
+class DriftMonitor:
+    """Fixed-memory per-feature histograms of production inputs.
+
+    Each update only increments counters in arrays sized by the training
+    profile, so memory does not grow with the number of predictions served.
+    Divergence against the training distribution is recomputed at most every
+    ``report_interval`` seconds.
+    """
+
+    def __init__(self, profile, report_interval=60, psi_threshold=0.2):
+        self.profile = profile
+        self.report_interval = report_interval
+        self.psi_threshold = psi_threshold
+        self._lock = threading.Lock()
+        self._report = None
+        self._report_time = 0.0
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.n_observed = 0
+            self.numeric_counts = {
+                name: np.zeros_like(spec['counts'])
+                for name, spec in self.profile['numeric'].items()
+            }
+            self.categorical_counts = {
+                name: np.zeros_like(spec['counts'])
+                for name, spec in self.profile['categorical'].items()
+            }
+            self._report = None
+
+    def update(self, features):
+        """Record one or more encoded feature rows (FEATURE_NAMES order)."""
+        X = np.asarray(features, dtype=float).reshape(-1, len(FEATURE_NAMES))
+        with self._lock:
+            self.n_observed += len(X)
+            for name, spec in self.profile['numeric'].items():
+                column = X[:, FEATURE_NAMES.index(name)]
+                bins = np.searchsorted(spec['edges'], column, side='right') - 1
+                np.add.at(self.numeric_counts[name], bins, 1)
+            for name, spec in self.profile['categorical'].items():
+                column = X[:, FEATURE_NAMES.index(name)]
+                categories = spec['categories']
+                for value in column:
+                    index = categories.index(value) if value in categories else len(categories)
+                    self.categorical_counts[name][index] += 1
+
+    def report(self, refresh=False):
+        """Per-feature divergence from the training profile (cached)."""
+        now = time.monotonic()
+        if (not refresh and self._report is not None
+                and now - self._report_time < self.report_interval):
+            return self._report
+
+        with self._lock:
+            observed = {**self.numeric_counts, **self.categorical_counts}
+            observed = {name: counts.copy() for name, counts in observed.items()}
+            n_observed = self.n_observed
+
+        expected = {name: spec['counts'] for kind in ('numeric', 'categorical')
+                    for name, spec in self.profile[kind].items()}
+        features = {}
+        for name, counts in observed.items():
+            psi = population_stability_index(expected[name], counts) if n_observed else 0.0
+            features[name] = {
+                'psi': psi,
+                'js_divergence': jensen_shannon(expected[name], counts) if n_observed else 0.0,
+                'drifted': psi > self.psi_threshold,
+                'counts': counts.tolist(),
+                'training_counts': expected[name].tolist(),
+            }
+
+        self._report = {
+            'n_observed': n_observed,
+            'n_training': self.profile['n_samples'],
+            'psi_threshold': self.psi_threshold,
+            'generated_at': time.time(),
+            'features': features,
+        }
+        self._report_time = now
+        return self._report
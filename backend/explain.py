@@ -0,0 +1,75 @@
+import numpy as np
+from scipy import sparse
+
+# Order of the columns fed to the scaler/model in /predict
+FEATURE_NAMES = ['age', 'gender', 'chestPain', 'restingBP', 'cholesterol',
+                 'fastingBS', 'restingECG', 'maxHR', 'smoking', 'obesity']
+
+
+class ForestExplainer:
+    """Per-feature contributions for a fitted RandomForestClassifier.
+
+    Uses tree-path decomposition: the probability at every node minus the
+    probability at its parent is credited to the feature the parent split on.
+    All node deltas of all trees are packed into one sparse
+    (total_nodes x n_features) matrix at load time, so explaining a batch is a
+    single ``decision_path`` call followed by a sparse matrix product.
+    """
+
+    def __init__(self, model, positive_class=1, feature_names=FEATURE_NAMES):
+        self.feature_names = list(feature_names)
+        self.class_index = list(model.classes_).index(positive_class)
+        n_trees = len(model.estimators_)
+        n_features = model.n_features_in_
+
+        rows, cols, deltas = [], [], []
+        bias = 0.0
+        offset = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            # Normalise node values to class probabilities (older sklearn
+            # stores weighted counts in tree_.value)
+            values = tree.value[:, 0, :]
+            probas = values[:, self.class_index] / values.sum(axis=1)
+            bias += probas[0]
+
+            parents = np.full(tree.node_count, -1, dtype=np.intp)
+            internal = np.flatnonzero(tree.children_left >= 0)
+            parents[tree.children_left[internal]] = internal
+            parents[tree.children_right[internal]] = internal
+
+            children = np.flatnonzero(parents >= 0)
+            rows.append(children + offset)
+            cols.append(tree.feature[parents[children]])
+            deltas.append(probas[children] - probas[parents[children]])
+            offset += tree.node_count
+
+        self.bias = bias / n_trees
+        self.node_contributions = sparse.csr_matrix(
+            (np.concatenate(deltas) / n_trees,
+             (np.concatenate(rows), np.concatenate(cols))),
+            shape=(offset, n_features)
+        )
+        self.model = model
+
+    def explain(self, X_scaled):
+        """Return (probabilities, contributions) for each row of X_scaled.
+
+        ``bias + contributions.sum(axis=1)`` equals the model's
+        ``predict_proba`` for the positive class.
+        """
+        indicator, _ = self.model.decision_path(X_scaled)
+        contributions = np.asarray((indicator @ self.node_contributions).todense())
+        probabilities = self.bias + contributions.sum(axis=1)
+        return probabilities, contributions
+
+    def explain_row(self, X_scaled):
+        """Explanation for a single row, formatted for a JSON response."""
+        _, contributions = self.explain(X_scaled)
+        return {
+            'base_value': float(self.bias),
+            'contributions': {
+                name: float(value)
+                for name, value in zip(self.feature_names, contributions[0])
+            }
+        }
@@ -0,0 +1,314 @@
+"""Bulk-ingest historical screenings into predictions_collection.
+
+Run from the backend directory:
+
+    python ingest.py screenings.csv --user-email clinic@example.com
+    python ingest.py screenings.ndjson --chunk-size 5000
+
+Each record uses the /predict payload fields (age, gender, chestPain, ...),
+optionally with ``user_email`` to attribute it to a user (otherwise
+--user-email is used) and an ISO ``timestamp`` for when it was taken.
+
+Reading, scoring and writing run as a three-stage pipeline connected by
+bounded queues, so at most a few chunks are in memory at once. Document ids
+are derived from the file's absolute path, size, modification time and row
+number, and the last fully written row is checkpointed, so an interrupted run
+can simply be started again. Only rows of the chunk that was in flight when a
+run stopped may already exist; any other duplicate id is reported as an error.
+"""
+import argparse
+import csv
+import datetime
+import hashlib
+import json
+import math
+import os
+import queue
+import sys
+import threading
+
+import numpy as np
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+import app as server
+from explain import FEATURE_NAMES
+
+# Fields that arrive as strings in CSV files but are numbers in /predict payloads
+NUMERIC_FIELDS = ['age', 'gender', 'restingBP', 'cholesterol', 'fastingBS',
+                  'maxHR', 'smoking', 'obesity']
+# Errors that mean a bad record, as opposed to a failing database or model
+RECORD_ERRORS = (ValueError, KeyError, TypeError)
+DUPLICATE_KEY = 11000
+DONE = object()
+
+logger = server.logger
+
+
+def read_records(path):
+    # NDJSON lines are decoded per record in parse_record, so one bad line
+    # only skips that row
+    with open(path, newline='') as f:
+        if path.endswith('.csv'):
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield line
+
+
+def parse_record(record):
+    if isinstance(record, str):
+        record = json.loads(record)
+        if not isinstance(record, dict):
+            raise ValueError('Record is not a JSON object')
+    input_data = {}
+    for field in FEATURE_NAMES:
+        if record.get(field) in ('', None):
+            continue  # reported as missing by parse_input_data
+        value = record[field]
+        if field in NUMERIC_FIELDS and isinstance(value, str):
+            # CSV numbers are strings; flags may also be spelled 'male'/'yes'
+            try:
+                value = float(value)
+            except ValueError:
+                value = value.strip()
+        if isinstance(value, float):
+            if not math.isfinite(value):
+                raise ValueError(f'Invalid value for {field}: {value}')
+            value = int(value) if value.is_integer() else value
+        input_data[field] = value
+
+    # Same validation as an edit through PUT /predictions/<id>
+    data, error = server.parse_input_data(input_data)
+    if error:
+        raise ValueError(error)
+    timestamp = record.get('timestamp')
+    data['user_email'] = record.get('user_email')
+    data['timestamp'] = datetime.datetime.fromisoformat(timestamp) if timestamp else None
+    return data
+
+
+def source_id(path):
+    # Identifies this exact file, so same-named files elsewhere get distinct ids
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    return hashlib.sha1(f'{path}:{stat.st_size}:{stat.st_mtime_ns}'.encode()).hexdigest()
+
+
+def record_id(source, row):
+    # Deterministic _id so re-running a chunk can't insert it twice
+    return ObjectId(hashlib.sha1(f'{source}:{row}'.encode()).digest()[:12])
+
+
+class Checkpoint:
+    """Rows fully written, plus the end of the chunk being written.
+
+    Rows in [rows_done, pending) may already be in the database after a crash;
+    duplicates anywhere else mean an id collision and are not ignored.
+    """
+
+    def __init__(self, path, source):
+        self.path = path
+        self.source = source
+        self.rows_done = 0
+        self.pending = 0
+
+    def load(self):
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                state = json.load(f)
+            if state.get('source') == self.source:
+                self.rows_done = state['rows_done']
+                self.pending = state.get('pending', self.rows_done)
+            else:
+                logger.warning(f"Checkpoint {self.path} is for a different version of the file, ignoring it")
+        return self.rows_done
+
+    def save(self, rows_done, pending):
+        self.rows_done, self.pending = rows_done, pending
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'source': self.source, 'rows_done': rows_done, 'pending': pending}, f)
+        os.replace(tmp_path, self.path)
+
+
+class UserResolver:
+    def __init__(self, default_email, max_cached=10000):
+        self.default_email = default_email
+        self.max_cached = max_cached
+        self.cache = {}
+        # Emails with no user, so their rows don't each cost a lookup
+        self.unknown = set()
+
+    def resolve(self, email):
+        email = email or self.default_email
+        if email in self.unknown:
+            raise ValueError(f'Unknown user: {email}')
+        if email not in self.cache:
+            if len(self.cache) >= self.max_cached:
+                self.cache.clear()
+            # Database errors propagate and stop the run before the checkpoint moves
+            user = server.users_collection.find_one({'email': email}, {'name': 1, 'email': 1})
+            if not user:
+                if len(self.unknown) >= self.max_cached:
+                    self.unknown.clear()
+                self.unknown.add(email)
+                raise ValueError(f'Unknown user: {email}')
+            self.cache[email] = user
+        return self.cache[email]
+
+
+def reader(path, start_row, chunk_size, out_queue, errors):
+    try:
+        chunk = []
+        for row, record in enumerate(read_records(path)):
+            if row < start_row:
+                continue
+            chunk.append((row, record))
+            if len(chunk) == chunk_size:
+                out_queue.put(chunk)
+                chunk = []
+        if chunk:
+            out_queue.put(chunk)
+    except Exception as e:
+        errors.append(e)
+    finally:
+        out_queue.put(DONE)
+
+
+def score_chunk(chunk, path, source, users, stats):
+    rows, parsed, owners = [], [], []
+    for row, record in chunk:
+        try:
+            data = parse_record(record)
+            owners.append(users.resolve(data.get('user_email')))
+            rows.append(row)
+            parsed.append(data)
+        except RECORD_ERRORS as e:
+            stats['skipped'] += 1
+            logger.error(f"Skipping row {row}: {str(e)}")
+
+    documents = []
+    if parsed:
+        features = np.array([server.build_features(data) for data in parsed], dtype=float)
+        probabilities = server.model.predict_proba(server.scaler.transform(features))
+        predictions = server.model.classes_.take(np.argmax(probabilities, axis=1))
+        now = datetime.datetime.utcnow()
+        for row, data, user, prediction, proba in zip(rows, parsed, owners, predictions, probabilities):
+            documents.append({
+                '_id': record_id(source, row),
+                'user_id': user['_id'],
+                'user_name': user['name'],
+                'user_email': user['email'],
+                'input_data': server.format_input_data(data),
+                'prediction': int(prediction),
+                'probability': float(proba[1]),
+                'timestamp': data['timestamp'] or now,
+                'risk_level': 'High' if prediction == 1 else 'Low',
+                'model_version': server.model_version,
+                'source': os.path.abspath(path)
+            })
+    return chunk[-1][0] + 1, rows, documents
+
+
+def write_chunk(rows, documents, resumable_until):
+    if not documents:
+        return 0
+    try:
+        inserted = len(server.predictions_collection.insert_many(documents, ordered=False).inserted_ids)
+    except BulkWriteError as e:
+        # Only rows of the chunk in flight when a previous run stopped may
+        # already exist; any other error, duplicate or not, is fatal
+        errors = [err for err in e.details['writeErrors']
+                  if err['code'] != DUPLICATE_KEY or rows[err['index']] >= resumable_until]
+        if errors:
+            raise
+        inserted = e.details['nInserted']
+
+    # Keep user documents in step with /predict: prediction ids and history version
+    by_user = {}
+    for document in documents:
+        by_user.setdefault(document['user_id'], []).append(document['_id'])
+    server.users_collection.bulk_write([
+        UpdateOne({'_id': user_id},
+                  {'$addToSet': {'predictions': {'$each': ids}}, '$inc': {'history_version': 1}})
+        for user_id, ids in by_user.items()
+    ], ordered=False)
+    return inserted
+
+
+def writer(in_queue, checkpoint, stats, errors):
+    while True:
+        item = in_queue.get()
+        if item is DONE:
+            return
+        if errors:
+            # Keep draining so the scoring stage never blocks on a full queue
+            continue
+        try:
+            rows_done, rows, documents = item
+            resumable_until = checkpoint.pending
+            checkpoint.save(checkpoint.rows_done, max(rows_done, resumable_until))
+            stats['inserted'] += write_chunk(rows, documents, resumable_until)
+            checkpoint.save(rows_done, max(rows_done, resumable_until))
+            logger.info(f"Ingested through row {rows_done} ({stats['inserted']} inserted)")
+        except Exception as e:
+            errors.append(e)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-ingest historical screenings")
+    parser.add_argument('path', help="CSV or NDJSON file")
+    parser.add_argument('--user-email', default=None, help="owner of records without user_email")
+    parser.add_argument('--chunk-size', type=int, default=2000)
+    parser.add_argument('--checkpoint', default=None, help="defaults to <path>.checkpoint")
+    parser.add_argument('--restart', action='store_true', help="ignore an existing checkpoint")
+    args = parser.parse_args()
+
+    if server.model is None:
+        server.load_model()
+
+    source = source_id(args.path)
+    checkpoint = Checkpoint(args.checkpoint or args.path + '.checkpoint', source)
+    start_row = 0 if args.restart else checkpoint.load()
+    if start_row:
+        logger.info(f"Resuming {args.path} from row {start_row}")
+
+    users = UserResolver(args.user_email)
+    stats = {'inserted': 0, 'skipped': 0}
+    errors = []
+    # Bounded queues keep at most a couple of chunks per stage in memory
+    parsed_queue = queue.Queue(maxsize=2)
+    scored_queue = queue.Queue(maxsize=2)
+    read_thread = threading.Thread(target=reader,
+                                   args=(args.path, start_row, args.chunk_size, parsed_queue, errors),
+                                   daemon=True)
+    write_thread = threading.Thread(target=writer, args=(scored_queue, checkpoint, stats, errors), daemon=True)
+    read_thread.start()
+    write_thread.start()
+
+    while not errors:
+        chunk = parsed_queue.get()
+        if chunk is DONE:
+            break
+        try:
+            scored = score_chunk(chunk, args.path, source, users, stats)
+        except Exception as e:
+            # Nothing from this chunk is written, so the checkpoint stays before it
+            errors.append(e)
+            break
+        scored_queue.put(scored)
+    scored_queue.put(DONE)
+    write_thread.join()
+
+    if errors:
+        logger.error(f"Ingest stopped: {str(errors[0])}")
+        return 1
+    logger.info(f"Done: {stats['inserted']} inserted, {stats['skipped']} skipped")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,154 @@
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+# Top-level module -> layer reported in the per-request summary. Frames from
+# other modules (stdlib, sockets, json) count towards the nearest caller that
+# has a layer.
+CATEGORIES = {
+    'app': 'app', '__main__': 'app',
+    'flask': 'flask', 'werkzeug': 'flask', 'flask_cors': 'flask',
+    'pymongo': 'pymongo', 'bson': 'pymongo',
+    'sklearn': 'sklearn', 'numpy': 'sklearn', 'scipy': 'sklearn', 'joblib': 'sklearn',
+    'jwt': 'token_required',
+}
+
+
+def frame_label(frame):
+    code = frame.f_code
+    name = getattr(code, 'co_qualname', code.co_name)
+    return f"{frame.f_globals.get('__name__', '?')}:{name}"
+
+
+def frame_category(frame):
+    module = frame.f_globals.get('__name__', '').split('.')[0]
+    if 'token_required' in getattr(frame.f_code, 'co_qualname', ''):
+        return 'token_required'
+    return CATEGORIES.get(module)
+
+
+class StackSampler(threading.Thread):
+    """Samples one thread's Python stack every ``interval`` seconds."""
+
+    def __init__(self, thread_id, interval):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.categories = Counter()
+        self.samples = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            # Walk from the innermost frame out; the sample's time belongs to
+            # the first frame with a layer, so shares add up to 100%
+            labels, category = [], None
+            while frame is not None:
+                labels.append(frame_label(frame))
+                if category is None:
+                    category = frame_category(frame)
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(labels))] += 1
+            self.categories[category or 'other'] += 1
+            self.samples += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+class ProfilingMiddleware:
+    """WSGI middleware that sample-profiles a fraction of requests.
+
+    A request is profiled when it wins the ``sample_rate`` draw or carries an
+    ``X-Profile`` header equal to the current token (handed out by the admin
+    endpoint). Each profiled request writes a collapsed-stack file, usable
+    with flamegraph.pl or speedscope, plus a per-layer summary. When the
+    sample rate is zero and no token is set, a request costs one attribute
+    check.
+    """
+
+    def __init__(self, wsgi_app, output_dir='profiles', interval=0.001, max_files=200):
+        self.wsgi_app = wsgi_app
+        self.output_dir = output_dir
+        self.interval = interval
+        self.max_files = max_files
+        self.sample_rate = 0.0
+        self.token = None
+
+    @property
+    def enabled(self):
+        return self.sample_rate > 0 or self.token is not None
+
+    def __call__(self, environ, start_response):
+        if not self.enabled:
+            return self.wsgi_app(environ, start_response)
+
+        flagged = self.token is not None and environ.get('HTTP_X_PROFILE') == self.token
+        if not flagged and random.random() >= self.sample_rate:
+            return self.wsgi_app(environ, start_response)
+
+        sampler = StackSampler(threading.get_ident(), self.interval)
+        start = time.perf_counter()
+        sampler.start()
+        iterable = None
+        try:
+            # Consume the body here so lazily generated responses are profiled too
+            iterable = self.wsgi_app(environ, start_response)
+            return list(iterable)
+        finally:
+            if hasattr(iterable, 'close'):
+                iterable.close()
+            sampler.stop()
+            # A failed write must never replace the response the app produced
+            try:
+                self.write(environ, sampler, time.perf_counter() - start)
+                self.prune()
+            except Exception as e:
+                logger.error(f"Error writing profile: {str(e)}")
+
+    def write(self, environ, sampler, elapsed):
+        os.makedirs(self.output_dir, exist_ok=True)
+        # PATH_INFO is client-controlled: keep a short, filesystem-safe slug
+        path = re.sub(r'[^A-Za-z0-9_-]', '_', environ.get('PATH_INFO', '/').strip('/'))[:64] or 'root'
+        method = re.sub(r'[^A-Za-z]', '', environ.get('REQUEST_METHOD', 'GET'))[:10]
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{method}-{path}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        base = os.path.join(self.output_dir, name)
+        with open(base + '.collapsed', 'w') as f:
+            for stack, count in sampler.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        with open(base + '.summary.txt', 'w') as f:
+            f.write(f"{environ.get('REQUEST_METHOD')} {environ.get('PATH_INFO')}: "
+                    f"{elapsed * 1e3:.1f} ms, {sampler.samples} samples\n")
+            for category, count in sampler.categories.most_common():
+                share = count / sampler.samples if sampler.samples else 0.0
+                f.write(f"{category:<16} {share:6.1%}  ~{share * elapsed * 1e3:.1f} ms\n")
+
+    def prune(self):
+        # Keep only the newest max_files files
+        paths = [os.path.join(self.output_dir, name) for name in os.listdir(self.output_dir)]
+        if len(paths) <= self.max_files:
+            return
+        paths.sort(key=lambda p: os.stat(p).st_mtime_ns if os.path.exists(p) else 0)
+        for p in paths[:len(paths) - self.max_files]:
+            try:
+                os.remove(p)
+            except FileNotFoundError:
+                pass  # removed by a concurrent request
+
+    def recent_files(self, limit=20):
+        if not os.path.isdir(self.output_dir):
+            return []
+        return sorted(os.listdir(self.output_dir), reverse=True)[:limit]
@@ -0,0 +1,204 @@
+"""Background incremental retraining job.
+
+Runs as its own process, never inside the Flask workers:
+
+    python retrain.py --once            # process new data, then exit
+    python retrain.py --interval 3600   # keep polling for new data
+
+New labeled screenings are dropped as CSV files (same columns as
+data/heart.csv) into data/labeled/. Each file is read in chunks; every chunk
+adds a few warm-started trees to a copy of the serving forest, trained on the
+chunk plus a replay sample of earlier data. A share of every chunk goes to a
+persistent holdout that is never trained on; the candidate is compared with the
+serving model on it and is only published when it is no worse. New rows are
+kept in the persisted replay buffer either way, so data from a rejected
+candidate still feeds later runs.
+"""
+import argparse
+import copy
+import glob
+import json
+import logging
+import os
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.metrics import accuracy_score
+from threadpoolctl import threadpool_limits
+
+from drift import build_training_profile
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger('retrain')
+
+MODEL_PATH = 'model/heart_model.pkl'
+SCALER_PATH = 'model/scaler.pkl'
+STATE_PATH = 'model/retrain_state.json'
+REPLAY_PATH = 'model/retrain_replay.csv'
+HOLDOUT_PATH = 'model/retrain_holdout.csv'
+PROFILE_PATH = 'model/training_profile.pkl'
+BASE_DATA_PATH = 'data/heart.csv'
+LABELED_DIR = 'data/labeled'
+
+
+def limit_cpu(cpus):
+    """Keep retraining from competing with the serving processes."""
+    os.nice(19)
+    if cpus and hasattr(os, 'sched_setaffinity'):
+        available = sorted(os.sched_getaffinity(0))
+        os.sched_setaffinity(0, set(available[-cpus:]))
+    # Single-threaded BLAS/OpenMP for anything sklearn calls into
+    threadpool_limits(1)
+
+
+def load_state():
+    if os.path.exists(STATE_PATH):
+        with open(STATE_PATH) as f:
+            return json.load(f)
+    return {'processed': []}
+
+
+def save_state(state):
+    tmp_path = STATE_PATH + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, STATE_PATH)
+
+
+def publish(obj, path):
+    # Write next to the target then rename, so servers never load a partial file
+    tmp_path = path + '.tmp'
+    joblib.dump(obj, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def load_frame(path, fallback):
+    if os.path.exists(path):
+        return pd.read_csv(path)
+    return fallback
+
+
+def run_once(args, rng):
+    state = load_state()
+    new_files = sorted(set(glob.glob(os.path.join(LABELED_DIR, '*.csv'))) - set(state['processed']))
+    if not new_files:
+        logger.info("No new labeled data")
+        return False
+
+    model = joblib.load(MODEL_PATH)
+    scaler = joblib.load(SCALER_PATH)
+    base = pd.read_csv(BASE_DATA_PATH)
+    columns = list(base.columns)
+
+    # Replay buffer and holdout persist across runs and are both bounded. The
+    # replay buffer starts from the base training data; the holdout only ever
+    # holds labeled rows that no model has been trained on.
+    replay = load_frame(REPLAY_PATH, base)[columns]
+    holdout = load_frame(HOLDOUT_PATH, base.iloc[:0])[columns]
+
+    candidate = copy.deepcopy(model)
+    candidate.set_params(warm_start=True, n_jobs=1)
+    n_rows = 0
+    for path in new_files:
+        logger.info(f"Reading {path}")
+        for chunk in pd.read_csv(path, chunksize=args.chunk_size):
+            chunk = chunk[columns].dropna()
+            is_holdout = rng.random(len(chunk)) < args.holdout_fraction
+            holdout = pd.concat([holdout, chunk[is_holdout]]).tail(args.max_holdout)
+            train = chunk[~is_holdout]
+            n_rows += len(chunk)
+            if train.empty:
+                continue
+
+            if train['target'].nunique() == 2:
+                sample = replay.sample(min(len(replay), len(train)), random_state=rng.integers(2**31))
+                batch = pd.concat([train, sample])
+                X = scaler.transform(batch.drop('target', axis=1).values)
+
+                # A fixed random_state would give every chunk's new trees the same
+                # seeds once the forest is capped at --max-trees
+                candidate.set_params(n_estimators=len(candidate.estimators_) + args.trees_per_chunk,
+                                     random_state=int(rng.integers(2**31)))
+                candidate.fit(X, batch['target'].values)
+                # Retire the oldest trees so the forest doesn't grow without bound
+                if len(candidate.estimators_) > args.max_trees:
+                    candidate.estimators_ = candidate.estimators_[-args.max_trees:]
+                    candidate.n_estimators = args.max_trees
+
+            replay = pd.concat([replay, train]).sample(
+                min(len(replay) + len(train), args.max_replay),
+                random_state=rng.integers(2**31))
+
+    # The new rows now live in the replay buffer/holdout, so the files are
+    # consumed whether or not this candidate gets published
+    replay.to_csv(REPLAY_PATH + '.tmp', index=False)
+    os.replace(REPLAY_PATH + '.tmp', REPLAY_PATH)
+    holdout.to_csv(HOLDOUT_PATH + '.tmp', index=False)
+    os.replace(HOLDOUT_PATH + '.tmp', HOLDOUT_PATH)
+    state['processed'].extend(new_files)
+
+    if n_rows == 0 or holdout['target'].nunique() < 2:
+        logger.info("Not enough labeled data to retrain")
+        save_state(state)
+        return False
+
+    X_holdout = scaler.transform(holdout.drop('target', axis=1).values)
+    y_holdout = holdout['target'].values
+    current_score = float(accuracy_score(y_holdout, model.predict(X_holdout)))
+    candidate_score = float(accuracy_score(y_holdout, candidate.predict(X_holdout)))
+    logger.info(f"Holdout accuracy on {len(holdout)} rows: serving {current_score:.4f}, "
+                f"candidate {candidate_score:.4f} ({n_rows} new rows)")
+
+    published = bool(candidate_score >= current_score)
+    state['last_run'] = {
+        'time': time.time(),
+        'rows': n_rows,
+        'holdout_rows': len(holdout),
+        'serving_accuracy': current_score,
+        'candidate_accuracy': candidate_score,
+        'published': published,
+    }
+    # Record the run before publishing so a failure can't re-ingest the same files
+    save_state(state)
+
+    if published:
+        candidate.set_params(warm_start=False)
+        # The drift baseline goes first: the app reloads when the model file changes
+        publish(build_training_profile(replay.drop('target', axis=1).values), PROFILE_PATH)
+        publish(candidate, MODEL_PATH)
+        logger.info("Published retrained model")
+    else:
+        logger.info("Candidate is worse than the serving model, not publishing")
+    return published
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incrementally retrain the heart disease model")
+    parser.add_argument('--once', action='store_true', help="run a single pass and exit")
+    parser.add_argument('--interval', type=int, default=3600, help="seconds between passes")
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    parser.add_argument('--trees-per-chunk', type=int, default=10)
+    parser.add_argument('--max-trees', type=int, default=200)
+    parser.add_argument('--max-replay', type=int, default=20000)
+    parser.add_argument('--max-holdout', type=int, default=20000)
+    parser.add_argument('--holdout-fraction', type=float, default=0.2)
+    parser.add_argument('--cpus', type=int, default=1, help="CPUs to pin the job to (0 = no pinning)")
+    args = parser.parse_args()
+
+    limit_cpu(args.cpus)
+    rng = np.random.default_rng(42)
+    while True:
+        try:
+            run_once(args, rng)
+        except Exception as e:
+            logger.error(f"Retraining failed: {str(e)}")
+            logger.exception("Full traceback:")
+        if args.once:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == '__main__':
+    main()